@@ -12,17 +12,18 @@ def get_w_hat(eigenspectra, fluxes):
     Since we will overflow memory if we actually calculate Phi, we have to
     determine w_hat in a memory-efficient manner.
 
+    Phi.T.dot(Phi) is the Kronecker product of the eigenspectra dot products with the
+    M x M identity (see :func:`get_phi_squared`), so the weights are solved for with
+    the small m x m system, applied to all of the spectra at once.
     """
-    m = len(eigenspectra)
-    M = len(fluxes)
-    out = np.empty((M * m,))
-    for i in range(m):
-        for j in range(M):
-            out[i * M + j] = eigenspectra[i].T @ fluxes[j]
+    eigenspectra = np.asarray(eigenspectra)
+    # All of the eigenspectrum-flux dot products at once, as an (m, M) array
+    out = eigenspectra @ np.asarray(fluxes).T
 
-    phi_squared = get_phi_squared(eigenspectra, M)
-    fac = sl.cho_factor(phi_squared, check_finite=False, overwrite_a=True)
-    return sl.cho_solve(fac, out, check_finite=False)
+    dots = eigenspectra @ eigenspectra.T
+    fac = sl.cho_factor(dots, check_finite=False, overwrite_a=True)
+    # Ordered as i * M + j, like the rows of Phi.T.dot(Phi)
+    return sl.cho_solve(fac, out, check_finite=False).ravel()
 
 
 def get_phi_squared(eigenspectra, M):
@@ -31,20 +32,34 @@ def get_phi_squared(eigenspectra, M):
 
     eigenspectra is a list of 1D numpy arrays.
     """
-    m = len(eigenspectra)
-    out = np.zeros((m * M, m * M))
-
+    eigenspectra = np.asarray(eigenspectra)
     # Compute all of the dot products pairwise, beforehand
-    dots = np.empty((m, m))
-    for i in range(m):
-        for j in range(m):
-            dots[i, j] = eigenspectra[i].T @ eigenspectra[j]
-
-    for i in range(M * m):
-        for jj in range(m):
-            ii = i // M
-            j = jj * M + (i % M)
-            out[i, j] = dots[ii, jj]
+    dots = eigenspectra @ eigenspectra.T
+    return _kron_identity(dots, M)
+
+
+def get_inv_phi_squared(eigenspectra, M):
+    """
+    Compute the inverse of Phi.T.dot(Phi). Since it is block-structured (see
+    :func:`get_phi_squared`), only the m x m eigenspectra dot products are inverted.
+
+    eigenspectra is a list of 1D numpy arrays.
+    """
+    eigenspectra = np.asarray(eigenspectra)
+    dots = eigenspectra @ eigenspectra.T
+    return _kron_identity(np.linalg.inv(dots), M)
+
+
+def _kron_identity(a, M):
+    """
+    The Kronecker product of the m x m array `a` with the M x M identity, where block
+    (ii, jj) of M x M has a[ii, jj] along its diagonal.
+    """
+    m = len(a)
+    out = np.zeros((m * M, m * M))
+    # Fill every one of the block diagonals in a single assignment
+    diag = np.arange(M)
+    out.reshape(m, M, m, M)[:, diag, :, diag] = a
     return out
 
 
@@ -67,19 +82,14 @@ def get_altered_prior_factors(eigenspectra, fluxes):
     M, npix = fluxes.shape
     m = len(eigenspectra)
 
-    Phi_w_hat = np.empty((M * npix, 1))
-    for i in range(M):
-        loss_per_M = np.zeros(npix)
-        for j in range(m):
-            loss_per_M += eigenspectra[j] * w_hat[i + j * M]
-        indices = slice(i * npix, (i + 1) * npix)
-        Phi_w_hat[indices] = loss_per_M.reshape(npix, -1)
+    # The reconstruction of every spectrum from its weights, stacked like the fluxes
+    Phi_w_hat = (w_hat.reshape(m, M).T @ np.asarray(eigenspectra)).ravel()
 
     F = fluxes.ravel()
     a_prime = 0.5 * M * (npix - m)
-    b_prime = 0.5 * (F.T @ F - F.T @ Phi_w_hat)
+    b_prime = 0.5 * (F @ F - F @ Phi_w_hat)
 
-    return a_prime, b_prime[0]
+    return a_prime, b_prime
 
 
 class Gamma:
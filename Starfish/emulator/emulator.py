@@ -8,13 +8,14 @@ import numpy as np
 from nptyping import NDArray
 from scipy.linalg import cho_factor, cho_solve
 from scipy.optimize import minimize
+from scipy.spatial import cKDTree
 from sklearn.decomposition import PCA
 
 from Starfish.grid_tools import HDF5Interface
 from Starfish.grid_tools.utils import determine_chunk_log
 from Starfish.utils import calculate_dv
 from .kernels import batch_kernel
-from ._utils import get_phi_squared, get_w_hat
+from ._utils import get_inv_phi_squared, get_w_hat
 
 log = logging.getLogger(__name__)
 
@@ -112,11 +113,11 @@ class Emulator:
         # Determine the minimum and maximum bounds of the grid
         self.min_params = grid_points.min(axis=0)
         self.max_params = grid_points.max(axis=0)
+        # Used by get_index to look up the nearest grid point
+        self._grid_tree = cKDTree(grid_points)
 
         # TODO find better variable names for the following
-        self.iPhiPhi = np.linalg.inv(
-            get_phi_squared(self.eigenspectra, self.grid_points.shape[0])
-        )
+        self.iPhiPhi = get_inv_phi_squared(self.eigenspectra, self.grid_points.shape[0])
         self.v11 = self.iPhiPhi / self.lambda_xi + batch_kernel(
             self.grid_points, self.grid_points, self.variances, self.lengthscales
         )
@@ -124,6 +125,22 @@ class Emulator:
 
         self._trained = False
 
+    @property
+    def v11(self) -> NDArray[float]:
+        """
+        numpy.ndarray : The covariance of the weights at the grid points. Its Cholesky
+        factorization is cached, so assign a new array rather than modifying it in
+        place.
+
+        :setter: Sets the value and clears the cached factorization.
+        """
+        return self._v11
+
+    @v11.setter
+    def v11(self, value):
+        self._v11 = value
+        self._v11_factor = None
+
     @property
     def lambda_xi(self) -> float:
         """
@@ -281,7 +298,12 @@ class Emulator:
         if isinstance(grid, str):
             grid = HDF5Interface(grid)
 
-        fluxes = np.array(list(grid.fluxes))
+        # Fill the array as the spectra are read instead of building an intermediate list
+        fluxes = None
+        for i, flux in enumerate(grid.fluxes):
+            if fluxes is None:
+                fluxes = np.empty((len(grid.grid_points), len(flux)))
+            fluxes[i] = flux
         # Normalize to an average of 1 to remove uninteresting correlation
         fluxes /= fluxes.mean(1, keepdims=True)
         # Center and whiten
@@ -348,6 +370,8 @@ class Emulator:
             If full_cov and reinterpret_batch are True
         ValueError
             If querying the emulator outside of its trained grid points
+        scipy.linalg.LinAlgError
+            If v11 is not positive-definite
         """
         params = np.atleast_2d(params)
 
@@ -373,8 +397,9 @@ class Emulator:
         v21 = v12.T
 
         # Recalculate the covariance
-        mu = v21 @ np.linalg.solve(self.v11, self.w_hat)
-        cov = v22 - v21 @ np.linalg.solve(self.v11, v12)
+        factor = self._get_v11_factor()
+        mu = v21 @ cho_solve(factor, self.w_hat)
+        cov = v22 - v21 @ cho_solve(factor, v12)
         if not full_cov:
             cov = np.diag(cov)
         if reinterpret_batch:
@@ -473,7 +498,7 @@ class Emulator:
             if np.any(self.lengthscales < 2 * self._grid_sep):
                 return np.inf
             loss = -self.log_likelihood()
-            self.log.debug(f"loss: {loss}")
+            self.log.debug("loss: %s", loss)
             return loss
 
         # Do the optimization
@@ -506,11 +531,21 @@ class Emulator:
         Returns
         -------
         index : int
-
+            The index of the nearest grid point (by the sum of absolute differences).
+            If several are equally near, the lowest index.
         """
         params = np.atleast_2d(params)
-        marks = np.abs(self.grid_points - np.expand_dims(params, 1)).sum(axis=-1)
-        return marks.argmin(axis=1).squeeze()
+        # The tree finds the nearest distance, then every grid point at (or within
+        # rounding of) that distance is compared directly, so that ties go to the
+        # lowest index like a brute-force search
+        dists, _ = self._grid_tree.query(params, p=1)
+        candidates = self._grid_tree.query_ball_point(params, dists * (1 + 1e-9), p=1)
+        index = np.empty(len(params), dtype=int)
+        for i, (param, cands) in enumerate(zip(params, candidates)):
+            cands = np.sort(cands)
+            marks = np.abs(self.grid_points[cands] - param).sum(axis=-1)
+            index[i] = cands[marks.argmin()]
+        return index.squeeze()
 
     def get_param_dict(self) -> dict:
         """
@@ -582,11 +617,21 @@ class Emulator:
         scipy.linalg.LinAlgError
             If the Cholesky factorization fails
         """
-        L, flag = cho_factor(self.v11)
+        L, flag = self._get_v11_factor()
         logdet = 2 * np.sum(np.log(np.diag(L)))
         sqmah = self.w_hat @ cho_solve((L, flag), self.w_hat)
         return -(logdet + sqmah) / 2
 
+    def _get_v11_factor(self):
+        """
+        The Cholesky factorization of v11. This is only computed once for each v11,
+        and shared by every call and the log likelihood. Unlike a general solve, it
+        raises a LinAlgError if v11 is not positive-definite.
+        """
+        if self._v11_factor is None:
+            self._v11_factor = cho_factor(self.v11)
+        return self._v11_factor
+
     def __repr__(self):
         output = "Emulator\n"
         output += "-" * 8 + "\n"
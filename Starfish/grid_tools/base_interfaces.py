@@ -1,7 +1,13 @@
-import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
 import logging
 import multiprocessing as mp
 import os
+import pickle
+import tempfile
+import zlib
 
 import h5py
 import numpy as np
@@ -11,11 +17,125 @@ import tqdm
 import Starfish.constants as C
 from Starfish.transforms import instrumental_broaden, resample
 from Starfish.utils import calculate_dv, calculate_dv_dict, create_log_lam_grid
-from .utils import chunk_list
 
 log = logging.getLogger(__name__)
 
 
+def _transform_flux(flux, wl_native, wl_loglam, wl_final, fwhm=None):
+    """
+    Resample `flux` (whose wavelengths are `wl_native`) onto the log-lambda grid,
+    optionally broaden it by an instrument with the given FWHM, and resample onto the
+    final wavelength grid.
+    """
+    flux = resample(wl_native, flux, wl_loglam)
+    if fwhm is not None:
+        flux = instrumental_broaden(wl_loglam, flux, fwhm)
+    return wl_final, resample(wl_loglam, flux, wl_final)
+
+
+# The data type the grid fluxes are stored as
+_FLUX_DTYPE = np.float32
+
+
+def _compress_chunks(fluxes, chunk_len, level):
+    """
+    Split each row of `fluxes` into chunks of `chunk_len` values and compress each the
+    same way HDF5's shuffle and gzip filters would, so that they can be written with
+    :func:`_write_compressed_flux`. The last chunk of each is padded with zeros to the
+    full length. Returns a list of the compressed chunks for every row.
+    """
+    n_fluxes, n_values = fluxes.shape
+    n_chunks = -(-n_values // chunk_len)
+    padded = np.zeros((n_fluxes, n_chunks * chunk_len), dtype=_FLUX_DTYPE)
+    padded[:, :n_values] = fluxes
+    itemsize = padded.dtype.itemsize
+    # The shuffle filter stores the first byte of every value, then the second...
+    # Each chunk is shuffled into the same scratch buffer, which is much quicker than
+    # copying out a fresh transposed array for every chunk
+    chunk_bytes = padded.view(np.uint8).reshape(n_fluxes, n_chunks, chunk_len, itemsize)
+    shuffled = np.empty((itemsize, chunk_len), dtype=np.uint8)
+    compressed = []
+    for flux_bytes in chunk_bytes:
+        chunks = []
+        for chunk in flux_bytes:
+            np.copyto(shuffled, chunk.T)
+            chunks.append(zlib.compress(shuffled, level))
+        compressed.append(chunks)
+    return compressed
+
+
+def _write_compressed_flux(group, name, n_values, chunks, chunk_len, level):
+    """
+    Create the dataset `name` in `group` for a flux of `n_values` values, declaring
+    the filters that :func:`_compress_chunks` applied to its `chunks`, and write the
+    chunks directly. Returns the dataset.
+    """
+    dset = group.create_dataset(
+        name,
+        shape=(n_values,),
+        dtype=_FLUX_DTYPE,
+        chunks=(chunk_len,),
+        shuffle=True,
+        compression="gzip",
+        compression_opts=level,
+    )
+    for i, chunk in enumerate(chunks):
+        dset.id.write_direct_chunk((i * chunk_len,), chunk)
+    return dset
+
+
+# The grid interface and transform used by the HDF5Creator worker processes. These
+# are set once per worker so only the parameters have to be sent for each spectrum.
+_worker_grid_interface = None
+_worker_transform = None
+
+
+def _init_worker(filename):
+    """
+    Load the grid interface and transform pickled to `filename`. They are read from
+    a file rather than passed as initializer arguments, since with the spawn start
+    method a large initializer argument blocks the parent forever if the worker dies
+    while starting up, rather than breaking the pool.
+    """
+    global _worker_grid_interface, _worker_transform
+    with open(filename, "rb") as f:
+        _worker_grid_interface, _worker_transform = pickle.load(f)
+
+
+def _process_worker_fluxes(params, chunk_len, level):
+    return _process_fluxes(
+        params, chunk_len, level, _worker_grid_interface, _worker_transform
+    )
+
+
+def _process_fluxes(params, chunk_len, level, grid_interface, transform):
+    """
+    Load and transform the fluxes for a batch of `params`, returning a list with the
+    number of values, the compressed chunks (see :func:`_compress_chunks`) and the raw
+    header for each, or None for those not in the grid.
+
+    The fluxes are transformed together, since the resampling splines can then share
+    one fit between all of the spectra.
+    """
+    processed = [None] * len(params)
+    indices, fluxes, headers = [], [], []
+    for i, param in enumerate(params):
+        try:
+            flux, header = grid_interface.load_flux(param, header=True)
+        except ValueError:
+            continue
+        indices.append(i)
+        fluxes.append(flux)
+        headers.append(header)
+
+    if fluxes:
+        _, fl_final = transform(np.array(fluxes))
+        compressed = _compress_chunks(fl_final, chunk_len, level)
+        for i, chunks, header in zip(indices, compressed, headers):
+            processed[i] = (fl_final.shape[-1], chunks, header)
+    return processed
+
+
 class GridInterface:
     """
     A base class to handle interfacing with synthetic spectral libraries.
@@ -137,6 +257,11 @@ class HDF5Interface:
     """
     Connect to an HDF5 file that stores spectra.
 
+    The file is opened on first use and kept open for subsequent reads. Call
+    :meth:`close` or use the interface as a context manager to release it. The
+    interface can be pickled or forked to worker processes, each of which opens its
+    own read-only handle.
+
     Parameters
     ----------
     filename : str or path-like
@@ -153,6 +278,8 @@ class HDF5Interface:
         # 2.) What are the minimum and maximum values for each parameter (self.bounds)
         # 3.) Which values exist for each parameter (self.points)
 
+        self._hdf5 = None
+        self._pid = None
         with h5py.File(self.filename, "r") as base:
             self.wl = base["wl"][:]
             self.key_name = base["flux"].attrs["key_name"]
@@ -163,22 +290,57 @@ class HDF5Interface:
             self.wave_units = base["wl"].attrs["units"]
             self.flux_units = base["flux"].attrs["units"]
 
-        # determine the bounding regions of the grid by sorting the grid_points
-        low = np.min(self.grid_points, axis=0)
-        high = np.max(self.grid_points, axis=0)
-        self.bounds = np.vstack((low, high)).T
+        # determine the values and bounding regions of the grid by sorting each
+        # parameter of the grid_points once (np.unique returns them sorted)
         self.points = [
-            np.unique(self.grid_points[:, i]) for i in range(self.grid_points.shape[1])
+            np.unique(col) for col in np.ascontiguousarray(self.grid_points.T)
         ]
+        self.bounds = np.array([(p[0], p[-1]) for p in self.points])
 
         self.ind = None  # Overwritten by other methods using this as part of a ModelInterpolator
 
         # Test if key-name is specified correctly
         try:
+            # Format the dataset names once rather than on every read
+            self._keys = {
+                tuple(grid_point): self.key_name.format(*grid_point)
+                for grid_point in self.grid_points
+            }
             self.load_flux(self.grid_points[0])
         except (IndexError, KeyError):
             raise ValueError("key_name is ill-specified.")
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getstate__(self):
+        # Open h5py files cannot be pickled, so workers reopen the file themselves
+        state = self.__dict__.copy()
+        state["_hdf5"] = None
+        state["_pid"] = None
+        return state
+
+    def _file(self):
+        """
+        The open HDF5 file, opening it if necessary. A handle inherited through a
+        fork is not shared with the parent; the child opens its own.
+        """
+        if self._hdf5 is None or self._pid != os.getpid():
+            self._hdf5 = h5py.File(self.filename, "r")
+            self._pid = os.getpid()
+        return self._hdf5
+
+    def close(self):
+        """
+        Close the HDF5 file, if it is open. It will be reopened by the next read.
+        """
+        if self._hdf5 is not None:
+            self._hdf5.close()
+            self._hdf5 = None
+
     def load_flux(self, parameters, header=False):
         """
         Load just the flux from the grid, with possibly an index truncation.
@@ -195,13 +357,18 @@ class HDF5Interface:
         """
         parameters = np.asarray(parameters)
 
-        key = self.key_name.format(*parameters)
-        with h5py.File(self.filename, "r") as hdf5:
-            hdr = dict(hdf5["flux"][key].attrs)
-            if self.ind is not None:
-                fl = hdf5["flux"][key][self.ind[0] : self.ind[1]]
-            else:
-                fl = hdf5["flux"][key][:]
+        key = self._keys.get(tuple(parameters))
+        if key is None:
+            key = self.key_name.format(*parameters)
+        dset = self._file()["flux"][key]
+        if self.ind is not None:
+            fl = dset[self.ind[0] : self.ind[1]]
+        else:
+            fl = dset[:]
+        # Reading the header attributes costs more than the flux itself, so only
+        # do it when they were asked for
+        if header:
+            hdr = dict(dset.attrs)
 
         # Note: will raise a KeyError if the file is not found.
         if header:
@@ -220,8 +387,29 @@ class HDF5Interface:
         Generator of numpy.ndarrays
         """
 
-        for grid_point in self.grid_points:
-            yield self.load_flux(grid_point, header=False)
+        # Look up the flux group once and slice each dataset directly rather than
+        # going through load_flux for every spectrum
+        flux_group = self._file()["flux"]
+        ind = slice(None) if self.ind is None else slice(self.ind[0], self.ind[1])
+
+        def read(grid_point):
+            return flux_group[self._keys[tuple(grid_point)]][ind]
+
+        # Decompress the next few spectra in a background thread (h5py releases the
+        # GIL while reading) so the consumer's work overlaps with the reads. The
+        # window is bounded so the whole grid is never held in memory at once.
+        window = 4
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = deque(
+                executor.submit(read, grid_point)
+                for grid_point in self.grid_points[:window]
+            )
+            for grid_point in self.grid_points[window:]:
+                flux = pending.popleft().result()
+                pending.append(executor.submit(read, grid_point))
+                yield flux
+            while pending:
+                yield pending.popleft().result()
 
 
 class HDF5Creator:
@@ -370,14 +558,10 @@ class HDF5Creator:
             mask = (self.wl_native > wl_min) & (self.wl_native < wl_max)
             self.wl_final = self.wl_native[mask]
             self.dv_final = self.dv_native
-
-            def inst_broaden(w, f):
-                return (w, f)
+            fwhm = None
 
         else:
-
-            def inst_broaden(w, f):
-                return (w, instrumental_broaden(w, f, self.instrument.FWHM))
+            fwhm = self.instrument.FWHM
 
             # The final wavelength grid, onto which we will interpolate the
             # Fourier filtered wavelengths, is part of the instrument object
@@ -386,60 +570,104 @@ class HDF5Creator:
             self.wl_final = wl_dict["wl"]
             self.dv_final = calculate_dv_dict(wl_dict)
 
-        def resample_loglam(w, f):
-            return (wl_loglam, resample(w, f, wl_loglam))
-
-        def resample_final(w, f):
-            return (self.wl_final, resample(w, f, self.wl_final))
-
-        self.transform = lambda flux: resample_final(
-            *inst_broaden(*resample_loglam(self.wl_native, flux))
+        # A partial rather than a closure so it can be sent to worker processes
+        self.transform = partial(
+            _transform_flux,
+            wl_native=self.wl_native,
+            wl_loglam=wl_loglam,
+            wl_final=self.wl_final,
+            fwhm=fwhm,
         )
 
         # Create the wl dataset separately using float64 due to rounding errors w/ interpolation.
-        wl_dset = self.hdf5.create_dataset("wl", data=self.wl_final, compression=9)
+        wl_dset = self.hdf5.create_dataset(
+            "wl", data=self.wl_final, chunks=self.wl_final.shape, compression=9
+        )
         wl_dset.attrs["air"] = self.grid_interface.air
         wl_dset.attrs["dv"] = self.dv_final
         wl_dset.attrs["units"] = self.grid_interface.wave_units
 
-    def process_grid(self):
-        """
-        Run :meth:`process_flux` for all of the spectra within the `ranges`
-        and store the processed spectra in the HDF5 file.
+    def process_grid(self, n_workers=1):
         """
+        Process all of the spectra within the `ranges` and store the processed
+        spectra in the HDF5 file. The spectra can be loaded and transformed in
+        parallel by worker processes.
 
-        # points is now a list of numpy arrays of the values in the grid
-        # Take all parameter permutations in self.points and create a list
-        # param_list will be a list of numpy arrays, specifying the parameters
-        param_list = []
-
-        # use itertools.product to create permutations of all possible values
-        for i in itertools.product(*self.points):
-            param_list.append(np.array(i))
+        Parameters
+        ----------
+        n_workers : int, optional
+            The number of worker processes to use. If 1, the spectra are processed in
+            this process. If None, will use one per CPU. Default is 1
 
-        all_params = np.array(param_list)
+        Raises
+        ------
+        RuntimeError
+            If a worker process dies, e.g. from running out of memory or because of a
+            missing ``__main__`` guard (see below)
 
-        invalid_params = []
+        Warning
+        -------
+        With more than one worker, the new processes import the calling script. With
+        the `spawn` start method (the default on macOS and Windows) ``process_grid``
+        must then be called from within an ``if __name__ == "__main__":`` block, and
+        the grid interface must be importable, so it cannot be a class defined in a
+        notebook.
+        """
 
-        self.log.debug("Total of {} files to process.".format(len(param_list)))
+        # points is now a list of numpy arrays of the values in the grid
+        # Take all parameter permutations in self.points, in the same order as
+        # itertools.product, as the rows of a single array
+        mesh = np.meshgrid(*self.points, indexing="ij")
+        all_params = np.stack([m.ravel() for m in mesh], axis=1)
+
+        valid = np.ones(len(all_params), dtype=bool)
+
+        self.log.debug("Total of {} files to process.".format(len(all_params)))
+
+        # The spectra are stored as float32 (the raw spectra are single precision)
+        # in shuffled, gzipped chunks of about 1 MiB, so reading a slice of a long
+        # spectrum (as the Interpolator does) only has to inflate the chunks it
+        # covers. gzip level 4 is much quicker to write than 9 for nearly the same
+        # size. The chunks are compressed by the workers, so the single writer
+        # doesn't become the bottleneck.
+        chunk_len = min(len(self.wl_final), 2 ** 20 // np.dtype(_FLUX_DTYPE).itemsize)
+        level = 4
+
+        # Load and transform the spectra in batches, possibly in worker processes.
+        # Only this process touches the HDF5 file, writing each spectrum in order as
+        # it arrives.
+        if n_workers is None:
+            n_workers = mp.cpu_count()
+        batch_size = 8
+        batches = [
+            all_params[i : i + batch_size]
+            for i in range(0, len(all_params), batch_size)
+        ]
+        processed_batches = self._process_batches(batches, n_workers, chunk_len, level)
 
         pbar = tqdm.tqdm(all_params)
         for i, param in enumerate(pbar):
             pbar.set_description("Processing {}".format(param))
-            # Load and process the flux
-            try:
-                flux, header = self.grid_interface.load_flux(param, header=True)
-            except ValueError:
+            if i % batch_size == 0:
+                processed_batch = next(processed_batches)
+            processed = processed_batch[i % batch_size]
+
+            if processed is None:
                 self.log.warning(
                     "Deleting {} from all params, does not exist.".format(param)
                 )
-                invalid_params.append(i)
+                valid[i] = False
                 continue
 
-            _, fl_final = self.transform(flux)
+            n_values, chunks, header = processed
 
-            flux = self.flux_group.create_dataset(
-                self.key_name.format(*param), data=fl_final, compression=9
+            flux = _write_compressed_flux(
+                self.flux_group,
+                self.key_name.format(*param),
+                n_values,
+                chunks,
+                chunk_len,
+                level,
             )
             # Store header keywords as attributes in HDF5 file
             for key, value in header.items():
@@ -449,10 +677,59 @@ class HDF5Creator:
                     flux.attrs[key] = value
 
         # Remove parameters that do no exist
-        all_params = np.delete(all_params, invalid_params, axis=0)
+        all_params = all_params[valid]
 
         gp = self.hdf5.create_dataset("grid_points", data=all_params, compression=9)
         names = list(map(lambda s: s.encode("utf-8"), self.grid_interface.param_names))
         gp.attrs["names"] = names
 
         self.hdf5.close()
+
+    def _process_batches(self, batches, n_workers, chunk_len, level):
+        """
+        Yield the processed batches (see :func:`_process_fluxes`) in order, using
+        `n_workers` worker processes if there is more than one. The number of batches
+        in flight is bounded so the whole grid is never held in memory at once.
+        """
+        if n_workers == 1:
+            for batch in batches:
+                yield _process_fluxes(
+                    batch, chunk_len, level, self.grid_interface, self.transform
+                )
+            return
+
+        window = 2 * n_workers
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "worker.pkl")
+            with open(filename, "wb") as f:
+                pickle.dump((self.grid_interface, self.transform), f)
+            try:
+                with ProcessPoolExecutor(
+                    max_workers=n_workers,
+                    initializer=_init_worker,
+                    initargs=(filename,),
+                ) as executor:
+                    pending = deque(
+                        executor.submit(_process_worker_fluxes, batch, chunk_len, level)
+                        for batch in batches[:window]
+                    )
+                    for next_batch in range(window, len(batches) + window):
+                        processed_batch = pending.popleft().result()
+                        if next_batch < len(batches):
+                            pending.append(
+                                executor.submit(
+                                    _process_worker_fluxes,
+                                    batches[next_batch],
+                                    chunk_len,
+                                    level,
+                                )
+                            )
+                        yield processed_batch
+            except BrokenProcessPool as e:
+                raise RuntimeError(
+                    "A worker process died unexpectedly while processing the grid. "
+                    "Possible causes include running out of memory (try fewer "
+                    "workers) or, with the spawn start method, calling process_grid "
+                    'outside of an `if __name__ == "__main__":` block or with a grid '
+                    "interface that cannot be imported."
+                ) from e
@@ -11,9 +11,35 @@ from Starfish.utils import create_log_lam_grid
 from .base_interfaces import GridInterface
 from .utils import vacuum_to_air, idl_float
 
+try:
+    import fitsio
+except ImportError:
+    fitsio = None
+
 log = logging.getLogger(__name__)
 
 
+def _read_fits(fname):
+    """
+    Read the primary image and header of a FITS file, using `fitsio` if it is
+    installed (it is considerably faster than astropy for the large PHOENIX files)
+    and falling back on :mod:`astropy.io.fits` otherwise.
+
+    Returns
+    -------
+    data : numpy.ndarray
+    header : dict
+    """
+    if fitsio is not None:
+        data, header = fitsio.read(fname, ext=0, header=True)
+        return data, dict(header)
+
+    with fits.open(fname) as hdu_list:
+        data = hdu_list[0].data
+        header = dict(hdu_list[0].header)
+    return data, header
+
+
 class PHOENIXGridInterface(GridInterface):
     """
     An Interface to the PHOENIX/Husser synthetic library.
@@ -21,6 +47,9 @@ class PHOENIXGridInterface(GridInterface):
     Note that the wavelengths in the spectra are in Angstrom and the flux are in :math:`F_\\lambda` as
     :math:`erg/s/cm^2/cm`
 
+    If `fitsio <https://github.com/esheldon/fitsio>`_ is installed it will be used to
+    read the spectra, which is faster than :mod:`astropy.io.fits`.
+
     Parameters
     ----------
     path : str or path-like
@@ -87,9 +116,11 @@ class PHOENIXGridInterface(GridInterface):
         else:
             self.wl_full = w_full
 
-        self.ind = (self.wl_full >= self.wl_range[0]) & (
-            self.wl_full <= self.wl_range[1]
-        )
+        # The wavelengths are sorted, so the range can be taken as a slice rather than
+        # gathering every flux through a boolean mask
+        low = np.searchsorted(self.wl_full, self.wl_range[0], side="left")
+        high = np.searchsorted(self.wl_full, self.wl_range[1], side="right")
+        self.ind = slice(low, high)
         self.wl = self.wl_full[self.ind]
         self.rname = "Z{2:}{3:}/lte{0:0>5.0f}-{1:.2f}{2:}{3:}.PHOENIX-ACES-AGSS-COND-2011-HiRes.fits"
         self.full_rname = os.path.join(self.path, self.rname)
@@ -130,26 +161,28 @@ class PHOENIXGridInterface(GridInterface):
         if not os.path.exists(fname):
             raise ValueError("{} is not on disk.".format(fname))
 
-        hdu_list = fits.open(fname)
-        flux = hdu_list[0].data
-        hdr = dict(hdu_list[0].header)
-        hdu_list.close()
+        flux, hdr = _read_fits(fname)
 
         # If we want to normalize the spectra, we must do it now since later we won't have the full EM range
         if norm:
-            flux *= 1e-8  # convert from erg/cm^2/s/cm to erg/cm^2/s/A
-            F_bol = np.trapz(flux, self.wl_full)
-            # bolometric luminosity is always 1 L_sun
-            flux *= C.F_sun / F_bol
+            # convert from erg/cm^2/s/cm to erg/cm^2/s/A
+            F_bol = 1e-8 * np.trapz(flux, self.wl_full)
+            # Only the trimmed spectrum is returned, so only it needs to be rescaled.
+            # Rescaling into a new array also means the returned flux doesn't keep
+            # the whole raw spectrum alive. bolometric luminosity is always 1 L_sun
+            flux = flux[self.ind] * (1e-8 * C.F_sun / F_bol)
+        else:
+            # A copy rather than a view, which would keep the whole raw spectrum alive
+            flux = flux[self.ind].copy()
 
         # Add temp, logg, Z, alpha, norm to the metadata
         hdr["norm"] = norm
         hdr["air"] = self.air
 
         if header:
-            return (flux[self.ind], hdr)
+            return (flux, hdr)
         else:
-            return flux[self.ind]
+            return flux
 
 
 class PHOENIXGridInterfaceNoAlpha(PHOENIXGridInterface):
@@ -248,9 +281,9 @@ class KuruczGridInterface(GridInterface):
         )
         self.full_rname = os.path.join(self.path, self.rname)
         self.wl_full = np.load(os.path.join(path, "kurucz_raw_wl.npy"))
-        self.ind = (self.wl_full >= self.wl_range[0]) & (
-            self.wl_full <= self.wl_range[1]
-        )
+        low = np.searchsorted(self.wl_full, self.wl_range[0], side="left")
+        high = np.searchsorted(self.wl_full, self.wl_range[1], side="right")
+        self.ind = slice(low, high)
         self.wl = self.wl_full[self.ind]
 
     def load_flux(self, parameters, header=False, norm=True):
@@ -271,10 +304,7 @@ class KuruczGridInterface(GridInterface):
         # Still need to check that file is in the grid, otherwise raise a C.GridError
         # Read all metadata in from the FITS header, and append to spectrum
         try:
-            flux_file = fits.open(fname)
-            f = flux_file[0].data
-            hdr = dict(flux_file[0].header)
-            flux_file.close()
+            f, hdr = _read_fits(fname)
         except:
             raise ValueError("{} is not on disk.".format(fname))
 
@@ -290,10 +320,12 @@ class KuruczGridInterface(GridInterface):
         hdr["norm"] = norm
         hdr["air"] = self.air
 
+        # A copy rather than a view, which would keep the whole raw spectrum alive
+        f = f[self.ind].copy()
         if header:
-            return (f[self.ind], hdr)
+            return (f, hdr)
         else:
-            return f[self.ind]
+            return f
 
     @staticmethod
     def get_wl_kurucz(filename):
@@ -3,7 +3,6 @@ from collections import OrderedDict
 import logging
 
 import numpy as np
-from scipy.interpolate import interp1d
 
 from .utils import determine_chunk_log
 
@@ -22,9 +21,7 @@ class IndexInterpolator:
         parameter_list = np.asarray(parameter_list)
         self.npars = parameter_list.shape[-1]
         self.parameter_list = np.unique(parameter_list)
-        self.index_interpolator = interp1d(
-            self.parameter_list, np.arange(len(self.parameter_list)), kind="linear"
-        )
+        self._indices = np.arange(len(self.parameter_list))
 
     def __call__(self, param):
         """
@@ -43,10 +40,14 @@ class IndexInterpolator:
                     self.npars, len(param)
                 )
             )
-        try:
-            index = self.index_interpolator(param)
-        except ValueError:
+        param = np.asarray(param)
+        if np.any(param < self.parameter_list[0]) or np.any(
+            param > self.parameter_list[-1]
+        ):
             raise ValueError("Requested param {} is out of bounds.".format(param))
+        # Linear interpolation of the index, without the overhead of building up an
+        # interp1d call for every spectrum
+        index = np.interp(param, self.parameter_list, self._indices)
         high = np.ceil(index).astype(int)
         low = np.floor(index).astype(int)
         frac_index = index - low
@@ -139,6 +140,10 @@ class Interpolator:
         # Store the interpolators as a list
         self.index_interpolator = IndexInterpolator(self.interface.points)
 
+        # Which of the (low, high) bounding values each corner of the interpolation
+        # hypercube takes in each parameter, in the same order as itertools.product
+        self._corners = np.array(list(itertools.product((0, 1), repeat=self.npars)))
+
         lenF = self.interface.ind[1] - self.interface.ind[0]
         self.fluxes = np.empty((2 ** self.npars, lenF))  # 8 rows, for temp, logg, Z
 
@@ -161,12 +166,9 @@ class Interpolator:
         params, weights = self.index_interpolator(parameters)
 
         # Selects all the possible combinations of parameters and weights
-        param_combos = list(itertools.product(*np.array(params).T))
-        weight_combos = list(itertools.product(*np.array(weights).T))
-
-        # Assemble key list necessary for indexing cache
-        key_list = [self.interface.key_name.format(*param) for param in param_combos]
-        weight_list = np.array([np.prod(weight) for weight in weight_combos])
+        dims = np.arange(self.npars)
+        param_combos = np.array(params)[self._corners, dims]
+        weight_list = np.prod(np.array(weights)[self._corners, dims], axis=1)
 
         assert np.allclose(
             np.sum(weight_list), np.array(1.0)
@@ -174,12 +176,14 @@ class Interpolator:
 
         # Assemble flux vector from cache, or load into cache if not there
         for i, param in enumerate(param_combos):
-            key = key_list[i]
-            if key not in self.cache.keys():
+            key = tuple(param)
+            fl = self.cache.get(key)
+            if fl is None:
                 # This method already allows loading only the relevant region from HDF5
                 fl = self.interface.load_flux(param, header=False)
                 self.cache[key] = fl
 
-            self.fluxes[i] = self.cache[key] * weight_list[i]
+            self.fluxes[i] = fl
 
-        return np.sum(self.fluxes, axis=0)
+        # Weighted sum of the corner spectra in one pass, without scaled temporaries
+        return weight_list @ self.fluxes
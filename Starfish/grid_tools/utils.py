@@ -232,7 +232,7 @@ def determine_chunk_log(wl, wl_min, wl_max):
 
         ind = (np.arange(len_wl) >= inds[0]) & (np.arange(len_wl) < inds[1])
     else:
-        print("keeping grid as is")
+        log.debug("keeping grid as is")
         ind = np.ones_like(wl, dtype="bool")
 
     assert (min(wl[ind]) <= wl_min) and (max(wl[ind]) >= wl_max), (
@@ -279,8 +279,7 @@ def calculate_n(wl):
     sigma = (1e4 / wl) ** 2
     f = 1.0 + 0.05792105 / (238.0185 - sigma) + 0.00167917 / (57.362 - sigma)
     new_wl = wl / f
-    n = wl / new_wl
-    print(n)
+    return wl / new_wl
 
 
 def vacuum_to_air_SLOAN(wl):
@@ -322,19 +321,19 @@ def air_to_vacuum(wl):
     return vac
 
 
-@np.vectorize
-def idl_float(idl_num: str) -> float:
+def idl_float(idl_num):
     """
-    Convert an IDL string number in scientific notation to a float
+    Convert an IDL string number in scientific notation to a float. Works on single
+    strings as well as whole arrays of strings at once.
 
     Parameters
     ----------
-    idl_num : str
+    idl_num : str or array_like of str
         Input str
 
     Returns
     -------
-    float
+    float or numpy.ndarray
         Output float
 
     Examples
@@ -344,5 +343,7 @@ def idl_float(idl_num: str) -> float:
     1.6e4
     ```
     """
-    idl_str = idl_num.lower()
-    return np.float(idl_str.replace("d", "e"))
+    idl_num = np.asarray(idl_num, dtype=str)
+    # Translate all of the strings in one pass rather than one element at a time
+    idl_str = " ".join(idl_num.ravel().tolist()).lower().replace("d", "e")
+    return np.array(idl_str.split(), dtype=np.float64).reshape(idl_num.shape)
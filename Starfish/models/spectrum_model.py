@@ -4,6 +4,7 @@ import logging
 
 from flatdict import FlatterDict
 import numpy as np
+from scipy.fft import rfft
 from scipy.linalg import cho_factor, cho_solve
 from scipy.optimize import minimize
 import toml
@@ -12,12 +13,12 @@ from Starfish import Spectrum
 from Starfish.emulator import Emulator
 from Starfish.transforms import (
     chebyshev_correct,
-    rotational_broaden,
     resample,
     doppler_shift,
-    extinct,
     rescale,
+    _extinction_factor,
     _get_renorm_factor,
+    _rotational_broaden_ff,
 )
 from Starfish.utils import calculate_dv, create_log_lam_grid
 from .kernels import global_covariance_matrix, local_covariance_matrix
@@ -170,6 +171,11 @@ class SpectrumModel:
         self._lnprob = None
         self._glob_cov = None
         self._loc_cov = None
+        self._resampled = None
+        self._resampled_key = None
+        self._bulk_fluxes_ff = None
+        self._extinction = None
+        self._extinction_key = None
 
         self.log = logging.getLogger(self.__class__.__name__)
 
@@ -277,19 +283,39 @@ class SpectrumModel:
         flux, cov : tuple
             The transformed flux and covariance matrix from the model
         """
-        wave = self.min_dv_wave
-        fluxes = self.bulk_fluxes
+        # Broadening, shifting and resampling the bulk fluxes only depends on vsini
+        # and vz, so keep the result until either of them changes
+        key = (self.params.get("vsini"), self.params.get("vz"))
+        if self._resampled is None or key != self._resampled_key:
+            wave = self.min_dv_wave
+            fluxes = self.bulk_fluxes
+
+            if "vsini" in self.params:
+                # The bulk fluxes never change, so only transform them once
+                if self._bulk_fluxes_ff is None:
+                    self._bulk_fluxes_ff = rfft(fluxes)
+                fluxes = _rotational_broaden_ff(
+                    self._bulk_fluxes_ff,
+                    fluxes.shape[-1],
+                    calculate_dv(wave),
+                    self.params["vsini"],
+                )
 
-        if "vsini" in self.params:
-            fluxes = rotational_broaden(wave, fluxes, self.params["vsini"])
+            if "vz" in self.params:
+                wave = doppler_shift(wave, self.params["vz"])
 
-        if "vz" in self.params:
-            wave = doppler_shift(wave, self.params["vz"])
+            self._resampled = resample(wave, fluxes, self.data.wave)
+            self._resampled_key = key
 
-        fluxes = resample(wave, fluxes, self.data.wave)
+        fluxes = self._resampled
 
         if "Av" in self.params:
-            fluxes = extinct(self.data.wave, fluxes, self.params["Av"])
+            # The extinction only depends on Av, so keep it until Av changes
+            Av = self.params["Av"]
+            if self._extinction is None or Av != self._extinction_key:
+                self._extinction = _extinction_factor(self.data.wave, Av)
+                self._extinction_key = Av
+            fluxes = fluxes * self._extinction
 
         if "cheb" in self.params:
             # force constant term to be 1 to avoid degeneracy with log_scale
@@ -299,6 +325,8 @@ class SpectrumModel:
         # Only rescale flux_mean and flux_std
         if "log_scale" in self.params:
             scale = np.exp(self.params["log_scale"])
+            # Don't rescale the kept fluxes in place
+            fluxes = fluxes.copy()
             fluxes[-2:] = rescale(fluxes[-2:], scale)
 
         weights, weights_cov = self.emulator(self.grid_params)
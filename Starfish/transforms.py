@@ -1,7 +1,10 @@
+from functools import lru_cache
+
 import extinction  # This may be marked as unused, but is necessary
 import numpy as np
 from numpy.polynomial.chebyshev import chebval
-from scipy.interpolate import InterpolatedUnivariateSpline
+from scipy.fft import irfft, rfft, rfftfreq
+from scipy.interpolate import make_interp_spline
 from scipy.special import j1
 
 from Starfish.constants import c_kms
@@ -10,7 +13,11 @@ from Starfish.utils import calculate_dv
 
 def resample(wave, flux, new_wave):
     """
-    Resample onto a new wavelength grid using k=5 spline interpolation
+    Resample onto a new wavelength grid using k=5 spline interpolation. If many
+    fluxes are given, a single spline is fit to all of them at once, sharing the
+    knots and the banded factorization between spectra. The spline is only fit to the
+    part of the original grid that covers the new one. Fluxes with NaNs or infs in
+    that part resample to NaNs, without affecting the others.
 
     Parameters
     ----------
@@ -35,11 +42,23 @@ def resample(wave, flux, new_wave):
     if np.any(new_wave <= 0):
         raise ValueError("Wavelengths must be positive")
 
-    if flux.ndim > 1:
-        interpolators = [InterpolatedUnivariateSpline(wave, fl, k=5) for fl in flux]
-        return np.array([interpolator(new_wave) for interpolator in interpolators])
-    else:
-        return InterpolatedUnivariateSpline(wave, flux, k=5)(new_wave)
+    # Fitting the spline costs far more than evaluating it, so skip the parts of the
+    # original grid well outside of the new one. The influence of a knot decays
+    # geometrically, so a margin of knots on either side gives the same result as
+    # fitting the whole grid. NaNs in the new grid are ignored here, so they only
+    # give NaNs at their own positions.
+    margin = 100
+    wave = np.asarray(wave)
+    low = np.searchsorted(wave, np.nanmin(new_wave), side="right") - margin
+    high = np.searchsorted(wave, np.nanmax(new_wave)) + margin
+    ind = slice(max(low, 0), min(high, len(wave)))
+
+    # Don't check for NaNs, so a bad spectrum in a stack gives NaNs rather than
+    # raising an error for all of them
+    spline = make_interp_spline(
+        wave[ind], np.asarray(flux)[..., ind], k=5, axis=-1, check_finite=False
+    )
+    return spline(new_wave)
 
 
 def instrumental_broaden(wave, flux, fwhm):
@@ -54,7 +73,8 @@ def instrumental_broaden(wave, flux, fwhm):
         \\mathcal{F}^{\\text{inst}}_v = \\frac{1}{\\sqrt{2\\pi \\sigma^2}} \\exp \\left[-\\frac12 \\left( \\frac{v}{\\sigma} \\right)^2 \\right]
 
     This is carried out by multiplication in the Fourier domain rather than using a
-    convolution function.
+    convolution function. The transforms use :mod:`scipy.fft`, which caches its
+    plans, so repeated calls on the same wavelength grid reuse the same plan.
 
     Parameters
     ----------
@@ -80,16 +100,28 @@ def instrumental_broaden(wave, flux, fwhm):
     if fwhm < 0:
         raise ValueError("FWHM must be non-negative")
     dv = calculate_dv(wave)
-    freq = np.fft.rfftfreq(flux.shape[-1], d=dv)
-    flux_ff = np.fft.rfft(flux)
+    flux_ff = rfft(flux)
 
     sigma = fwhm / 2.355
-    flux_ff *= np.exp(-2 * (np.pi * sigma * freq) ** 2)
+    flux_ff *= _gaussian_taper(flux.shape[-1], dv, sigma)
 
-    flux_final = np.fft.irfft(flux_ff, n=flux.shape[-1])
+    flux_final = irfft(flux_ff, n=flux.shape[-1], overwrite_x=True)
     return flux_final
 
 
+@lru_cache(maxsize=8)
+def _gaussian_taper(n, dv, sigma):
+    """
+    The Fourier transform of a Gaussian kernel with width `sigma` on `n` points spaced
+    by `dv`. This is cached since a grid is usually broadened many times by the same
+    instrument, so the returned array is read-only.
+    """
+    freq = rfftfreq(n, d=dv)
+    taper = np.exp(-2 * (np.pi * sigma * freq) ** 2)
+    taper.flags.writeable = False
+    return taper
+
+
 def rotational_broaden(wave, flux, vsini):
     """
     Broadens flux according to a rotational broadening kernel from Gray (2005) [1]_
@@ -118,20 +150,46 @@ def rotational_broaden(wave, flux, vsini):
     Cambridge: Cambridge University Press. doi:10.1017/CB09781316036570
     """
 
+    dv = calculate_dv(wave)
+    flux_ff = rfft(flux)
+    return _rotational_broaden_ff(flux_ff, flux.shape[-1], dv, vsini, overwrite=True)
+
+
+def _rotational_broaden_ff(flux_ff, n, dv, vsini, overwrite=False):
+    """
+    Rotationally broaden fluxes that have already been Fourier transformed, for
+    callers that broaden the same fluxes by many `vsini`. Returns the broadened
+    fluxes with length `n` in real space. `flux_ff` is only modified in place if
+    `overwrite` is True.
+    """
     if vsini <= 0:
         raise ValueError("vsini must be positive")
 
-    dv = calculate_dv(wave)
-    freq = np.fft.rfftfreq(flux.shape[-1], dv)
-    flux_ff = np.fft.rfft(flux)
-    # Calculate the stellar broadening kernel (Gray 2008)
-    ub = 2.0 * np.pi * vsini * freq
-    # Remove 0th frequency
-    ub = ub[1:]
-    sb = j1(ub) / ub - 3 * np.cos(ub) / (2 * ub ** 2) + 3.0 * np.sin(ub) / (2 * ub ** 3)
-    flux_ff *= np.insert(sb, 0, 1.0)
-    flux_final = np.fft.irfft(flux_ff, n=flux.shape[-1])
-    return flux_final
+    kernel = _rotational_kernel(n, float(dv), float(vsini))
+    if overwrite:
+        flux_ff *= kernel
+    else:
+        flux_ff = flux_ff * kernel
+    return irfft(flux_ff, n=n, overwrite_x=True)
+
+
+@lru_cache(maxsize=8)
+def _rotational_kernel(n, dv, vsini):
+    """
+    The Fourier transform of the rotational broadening kernel (Gray 2008) for `vsini`
+    on `n` points spaced by `dv`. This is cached since a model is often evaluated many
+    times with the same `vsini` (e.g. while it is frozen), so the returned array is
+    read-only.
+    """
+    freq = rfftfreq(n, d=dv)
+    # Fill the kernel in place rather than building it up from temporaries and
+    # inserting the 0th frequency
+    sb = np.empty_like(freq)
+    sb[0] = 1.0
+    ub = 2.0 * np.pi * vsini * freq[1:]
+    sb[1:] = j1(ub) / ub + 1.5 * (np.sin(ub) / ub - np.cos(ub)) / (ub * ub)
+    sb.flags.writeable = False
+    return sb
 
 
 def doppler_shift(wave, vz):
@@ -192,6 +250,17 @@ def extinct(wave, flux, Av, Rv=3.1, law="ccm89"):
         The extincted fluxes, with same shape as input fluxes.
     """
 
+    flux_final = flux * _extinction_factor(wave, Av, Rv, law)
+    return flux_final
+
+
+def _extinction_factor(wave, Av, Rv=3.1, law="ccm89"):
+    """
+    The factor :math:`10^{-0.4 A_\\lambda}` that :func:`extinct` multiplies the
+    fluxes by, where :math:`A_\\lambda` is the extinction of the given law for `Av`
+    and `Rv`, for callers that extinct many fluxes on the same wavelengths by the
+    same `Av`.
+    """
     if law not in ["ccm89", "odonnell94", "calzetti00", "fitzpatrick99", "fm07"]:
         raise ValueError("Invalid extinction law given")
     if Rv <= 0:
@@ -202,8 +271,8 @@ def extinct(wave, flux, Av, Rv=3.1, law="ccm89"):
         A_l = law_fn(wave.astype(np.double), Av)
     else:
         A_l = law_fn(wave.astype(np.double), Av, Rv)
-    flux_final = flux * 10 ** (-0.4 * A_l)
-    return flux_final
+    # exp is considerably quicker than a power of 10
+    return np.exp(-0.4 * np.log(10) * A_l)
 
 
 def rescale(flux, scale):
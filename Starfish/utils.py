@@ -77,9 +77,13 @@ def create_log_lam_grid(dv, start, end):
     CRVAL1 = np.log10(start)
     CRVALN = np.log10(end)
     N = (CRVALN - CRVAL1) / CDELT_temp
-    NAXIS1 = 2
-    while NAXIS1 < N:  # Make NAXIS1 an integer power of 2 for FFT purposes
-        NAXIS1 *= 2
+    # Make NAXIS1 the smallest integer power of 2 (at least 2) that is >= N, for FFT
+    # purposes. frexp gives N = m * 2**e with 0.5 <= m < 1, so N is itself a power
+    # of 2 exactly when m == 0.5
+    mantissa, exponent = np.frexp(N)
+    if mantissa == 0.5:
+        exponent -= 1
+    NAXIS1 = 2 ** max(int(exponent), 1)
 
     CDELT1 = (CRVALN - CRVAL1) / (NAXIS1 - 1)
 
@@ -48,7 +48,7 @@ setup(
         "nptyping==1.*",
         "numpy==1.*,>=1.16.0",
         "scikit-learn==0.*,>=0.21.2",
-        "scipy==1.*,>=1.3.0",
+        "scipy==1.*,>=1.4.0",
         "toml==0.10.*,>=0.10.1",
         "tqdm==4.*",
     ],
@@ -60,6 +60,7 @@ setup(
             "IPython",
             "sphinx-autodoc-typehints==1.10.3",
         ],
+        "fitsio": ["fitsio==1.*"],
         "test": [
             "coveralls==1.*,>=1.8.0",
             "pytest==4.*,>=4.6.0",
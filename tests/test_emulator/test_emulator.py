@@ -2,6 +2,7 @@ import numpy as np
 import pytest
 
 from Starfish.emulator import Emulator
+from Starfish.emulator.kernels import batch_kernel
 
 
 class TestEmulator:
@@ -59,6 +60,34 @@ class TestEmulator:
         assert len(flux) == len(params)
         assert np.all(np.isfinite(flux))
 
+    def test_log_likelihood_after_set_params(self, mock_emulator):
+        init_ll = mock_emulator.log_likelihood()
+        P0 = mock_emulator.get_param_vector()
+        P0[0] += 1.0
+        mock_emulator.set_param_vector(P0)
+        ll = mock_emulator.log_likelihood()
+        assert not np.isclose(ll, init_ll)
+        v11, w_hat = mock_emulator.v11, mock_emulator.w_hat
+        expected = -(np.linalg.slogdet(v11)[1] + w_hat @ np.linalg.solve(v11, w_hat))
+        assert np.isclose(ll, expected / 2)
+
+    def test_assign_v11(self, mock_emulator):
+        params = [6020, 4.21, -0.01]
+        mock_emulator.log_likelihood()
+        v11 = mock_emulator.v11 + np.eye(len(mock_emulator.v11))
+        mock_emulator.v11 = v11
+        w_hat = mock_emulator.w_hat
+        expected = -(np.linalg.slogdet(v11)[1] + w_hat @ np.linalg.solve(v11, w_hat))
+        assert np.isclose(mock_emulator.log_likelihood(), expected / 2)
+        v12 = batch_kernel(
+            mock_emulator.grid_points,
+            np.atleast_2d(params),
+            mock_emulator.variances,
+            mock_emulator.lengthscales,
+        )
+        mu, _ = mock_emulator(params)
+        np.testing.assert_allclose(mu, v12.T @ np.linalg.solve(v11, w_hat))
+
     def test_warns_before_trained(self, mock_emulator):
         with pytest.warns(UserWarning):
             mock_emulator([6000, 4.2, 0.0])
@@ -124,3 +153,19 @@ class TestEmulator:
         params = mock_emulator.grid_points[test_index]
         index = mock_emulator.get_index(params)
         assert index == test_index
+
+    def test_get_index_ties(self, mock_emulator):
+        grid_points = mock_emulator.grid_points
+        # Midpoints between pairs of grid points are equally near to both
+        pairs = np.random.default_rng(0).integers(len(grid_points), size=(200, 2))
+        params = grid_points[pairs].mean(axis=1)
+        indices = mock_emulator.get_index(params)
+        marks = np.abs(grid_points - np.expand_dims(params, 1)).sum(axis=-1)
+        np.testing.assert_array_equal(indices, marks.argmin(axis=1))
+
+    def test_get_index_many(self, mock_emulator):
+        grid_points = mock_emulator.grid_points
+        params = grid_points[[1, 4, 7]] + 0.1 * np.diff(grid_points[:2], axis=0)
+        indices = mock_emulator.get_index(params)
+        marks = np.abs(grid_points - np.expand_dims(params, 1)).sum(axis=-1)
+        np.testing.assert_array_equal(indices, marks.argmin(axis=1))
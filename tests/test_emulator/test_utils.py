@@ -6,6 +6,7 @@ from sklearn.decomposition import PCA
 from Starfish.emulator._utils import (
     get_w_hat,
     get_phi_squared,
+    get_inv_phi_squared,
     get_altered_prior_factors,
     Gamma,
 )
@@ -49,6 +50,22 @@ class TestEmulatorUtils:
         assert phi2.shape == (M * m, M * m)
         assert np.all(np.isfinite(phi2))
 
+    def test_inv_phi_squared(self, grid_setup):
+        eigs, fluxes = grid_setup
+        M = len(fluxes)
+        phi2 = get_phi_squared(eigs, M)
+        iphi2 = get_inv_phi_squared(eigs, M)
+        np.testing.assert_allclose(iphi2, np.linalg.inv(phi2), atol=1e-12)
+
+    def test_w_hat_solves_phi_squared(self, grid_setup):
+        eigs, fluxes = grid_setup
+        w_hat = get_w_hat(eigs, fluxes)
+        phi2 = get_phi_squared(eigs, len(fluxes))
+        # The mock fluxes are single precision
+        np.testing.assert_allclose(
+            phi2 @ w_hat, (eigs @ fluxes.T).ravel(), rtol=1e-5, atol=1e-5
+        )
+
     @pytest.mark.parametrize("params", [(1, 0.001), (2, 0.075)])
     def test_gamma_dist(self, params):
         a, b = params
@@ -1,4 +1,5 @@
 import os
+import pickle
 import types
 from itertools import product
 
@@ -6,7 +7,12 @@ import h5py
 import numpy as np
 import pytest
 
-from Starfish.grid_tools import HDF5Creator, HDF5Interface
+from Starfish.grid_tools import HDF5Creator, HDF5Interface, PHOENIXGridInterfaceNoAlpha
+
+
+class DyingGridInterface(PHOENIXGridInterfaceNoAlpha):
+    def load_flux(self, parameters, header=False, norm=True):
+        os._exit(1)
 
 
 class TestHDF5Creator:
@@ -47,6 +53,38 @@ class TestHDF5Creator:
             assert name in flux
             assert flux[name].shape == base["wl"].shape
 
+    def test_stored_fluxes(self, mock_creator, mock_hdf5, mock_no_alpha_grid):
+        with h5py.File(mock_hdf5, "r") as base:
+            key_name = base["flux"].attrs["key_name"]
+            for param in base["grid_points"][::4]:
+                stored = base["flux"][key_name.format(*param)][:]
+                flux = mock_no_alpha_grid.load_flux(param)
+                expected = mock_creator.transform(flux)[1].astype(np.float32)
+                np.testing.assert_array_equal(stored, expected)
+
+    def test_stored_fluxes_many_chunks(self, mock_no_alpha_grid, tmpdir_factory):
+        outfile = tmpdir_factory.mktemp("hdf5tests").join("test_many_chunks.hdf5")
+        creator = HDF5Creator(
+            mock_no_alpha_grid,
+            filename=outfile,
+            instrument=None,
+            wl_range=(2e4, 3.4e4),
+            ranges=[[6000, 6000], [4.5, 4.5], [0, 0]],
+        )
+        creator.process_grid()
+        with h5py.File(outfile, "r") as base:
+            param = base["grid_points"][0]
+            dset = base["flux"][base["flux"].attrs["key_name"].format(*param)]
+            # The last chunk is only partly filled
+            assert len(dset) > dset.chunks[0]
+            assert len(dset) % dset.chunks[0] != 0
+            assert dset.dtype == np.float32
+            assert dset.shuffle
+            assert dset.compression == "gzip"
+            flux = mock_no_alpha_grid.load_flux(param)
+            expected = creator.transform(flux)[1].astype(np.float32)
+            np.testing.assert_array_equal(dset[:], expected)
+
     def test_no_instrument(self, mock_no_alpha_grid, tmpdir_factory, grid_points):
         ranges = np.vstack([np.min(grid_points, 0), np.max(grid_points, 0)]).T
         tmpdir = tmpdir_factory.mktemp("hdf5tests")
@@ -60,6 +98,45 @@ class TestHDF5Creator:
         )
         creator.process_grid()
 
+    def test_parallel_matches_serial(
+        self,
+        mock_hdf5,
+        mock_no_alpha_grid,
+        mock_instrument,
+        tmpdir_factory,
+        grid_points,
+    ):
+        ranges = np.vstack([np.min(grid_points, 0), np.max(grid_points, 0)]).T
+        outfile = tmpdir_factory.mktemp("hdf5tests").join("test_parallel.hdf5")
+        creator = HDF5Creator(
+            mock_no_alpha_grid,
+            filename=outfile,
+            instrument=mock_instrument,
+            wl_range=(2e4, 3e4),
+            ranges=ranges,
+        )
+        creator.process_grid(n_workers=2)
+        with h5py.File(mock_hdf5, "r") as serial, h5py.File(outfile, "r") as parallel:
+            np.testing.assert_array_equal(
+                serial["grid_points"][:], parallel["grid_points"][:]
+            )
+            for key in serial["flux"]:
+                np.testing.assert_array_equal(
+                    serial["flux"][key][:], parallel["flux"][key][:]
+                )
+
+    def test_dead_worker_raises(self, mock_no_alpha_grid, tmpdir_factory):
+        outfile = tmpdir_factory.mktemp("hdf5tests").join("test_dead_worker.hdf5")
+        grid = DyingGridInterface(path=mock_no_alpha_grid.path)
+        creator = HDF5Creator(
+            grid,
+            filename=outfile,
+            wl_range=(2e4, 3e4),
+            ranges=[[6000, 6100], [4.0, 4.5], [-0.5, 0.0]],
+        )
+        with pytest.raises(RuntimeError):
+            creator.process_grid(n_workers=2)
+
     @pytest.mark.parametrize(
         "wl_range",
         [
@@ -176,3 +253,32 @@ class TestHDF5Interface:
         fluxes = mock_hdf5_interface.fluxes
         assert isinstance(fluxes, types.GeneratorType)
         assert len(list(fluxes)) == len(list(grid_points))
+
+    def test_fluxes_order(self, mock_hdf5_interface):
+        for grid_point, flux in zip(
+            mock_hdf5_interface.grid_points, mock_hdf5_interface.fluxes
+        ):
+            np.testing.assert_array_equal(
+                flux, mock_hdf5_interface.load_flux(grid_point)
+            )
+
+    def test_close(self, mock_hdf5):
+        interface = HDF5Interface(mock_hdf5)
+        flux = interface.load_flux((6000, 4.5, 0))
+        interface.close()
+        np.testing.assert_array_equal(interface.load_flux((6000, 4.5, 0)), flux)
+        interface.close()
+
+    def test_pickle(self, mock_hdf5):
+        interface = HDF5Interface(mock_hdf5)
+        flux = interface.load_flux((6000, 4.5, 0))
+        unpickled = pickle.loads(pickle.dumps(interface))
+        np.testing.assert_array_equal(unpickled.load_flux((6000, 4.5, 0)), flux)
+        interface.close()
+        unpickled.close()
+
+    def test_context_manager(self, mock_hdf5):
+        with HDF5Interface(mock_hdf5) as interface:
+            flux = interface.load_flux((6000, 4.5, 0))
+        assert interface._hdf5 is None
+        assert isinstance(flux, np.ndarray)
@@ -82,6 +82,14 @@ class TestPHOENIXGridInterface:
         assert header["PHXM_H"] == 0.0
         assert header["PHXALPHA"] == 0.0
 
+    @pytest.mark.parametrize("norm", [True, False])
+    def test_load_flux_is_compact(self, PHOENIXModels, norm):
+        grid = PHOENIXGridInterface(path=PHOENIXModels, wl_range=(5000, 6000))
+        fl = grid.load_flux((6100, 4.5, 0.0, 0.0), norm=norm)
+        assert len(fl) == len(grid.wl)
+        # Not a view of the whole raw spectrum
+        assert fl.base is None
+
     def test_load_alpha(self, grid):
         _, header = grid.load_flux((6100, 4.5, 0.0, -0.2), header=True)
         assert header["PHXALPHA"] == -0.2
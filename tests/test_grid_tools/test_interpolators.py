@@ -30,7 +30,9 @@ class TestIndexInterpolator:
         output = mock_index_interpolator(input)
         np.testing.assert_array_almost_equal(output, expected, 4)
 
-    @pytest.mark.parametrize("input", [(1, 2), (6100, 4.2, -0.2, 0.0)])
+    @pytest.mark.parametrize(
+        "input", [(1, 2), (6100, 4.2, -0.2, 0.0), (1e4, 4.2, -0.2), (-10, 4.2, -0.2)]
+    )
     def test_bounds_failure(self, input, mock_index_interpolator):
         with pytest.raises(ValueError):
             mock_index_interpolator(input)
@@ -58,3 +58,8 @@ class TestWavelengthUtils:
 )
 def test_idl_float(idl, num):
     np.testing.assert_almost_equal(idl_float(idl), num)
+
+
+def test_idl_float_array():
+    nums = idl_float(np.array(["1D4", "1.0", "1D-4", "1d0"]))
+    np.testing.assert_almost_equal(nums, [1e4, 1.0, 1e-4, 1.0])
@@ -8,6 +8,7 @@ import numpy as np
 import scipy.stats as st
 
 from Starfish.models import SpectrumModel
+from Starfish.transforms import rotational_broaden, resample, extinct
 
 
 class TestSpectrumModel:
@@ -315,6 +316,41 @@ class TestSpectrumModel:
         assert np.allclose(mock_model._loc_cov, loc)
         assert np.allclose(mock_model._glob_cov, glob)
 
+    def test_resample_caching(self, mock_model):
+        flux, _ = mock_model()
+        resampled = mock_model._resampled
+        np.testing.assert_allclose(mock_model()[0], flux)
+        assert mock_model._resampled is resampled
+        mock_model["vz"] = 20
+        assert not np.allclose(mock_model()[0], flux)
+        mock_model["vz"] = 0
+        np.testing.assert_allclose(mock_model()[0], flux)
+
+    def test_broadening_matches_transform(self, mock_model):
+        mock_model["vsini"] = 20
+        mock_model()
+        mock_model["vsini"] = 40
+        mock_model()
+        flux = rotational_broaden(mock_model.min_dv_wave, mock_model.bulk_fluxes, 40)
+        expected = resample(mock_model.min_dv_wave, flux, mock_model.data.wave)
+        np.testing.assert_allclose(mock_model._resampled, expected)
+
+    def test_extinction_caching(self, mock_model):
+        mock_model["Av"] = 0.4
+        flux, _ = mock_model()
+        factor = mock_model._extinction
+        np.testing.assert_allclose(mock_model()[0], flux)
+        assert mock_model._extinction is factor
+        mock_model["Av"] = 0.6
+        mock_model()
+        expected = extinct(mock_model.data.wave, np.ones_like(factor), 0.6)
+        np.testing.assert_allclose(mock_model._extinction, expected)
+
+    def test_bad_vsini(self, mock_model):
+        mock_model["vsini"] = -1
+        with pytest.raises(ValueError):
+            mock_model()
+
     def test_fails_with_multiple_orders(self, mock_spectrum, mock_emulator):
         two_order_spectrum = mock_spectrum.reshape((2, -1))
         with pytest.raises(ValueError):
@@ -2,6 +2,7 @@ import itertools
 
 import numpy as np
 import pytest
+from scipy.interpolate import make_interp_spline
 
 from Starfish.transforms import (
     instrumental_broaden,
@@ -92,6 +93,39 @@ class TestResample:
         fluxes = resample(mock_data[0], flux_stack, new_wave)
         assert fluxes.shape == (4, len(new_wave))
 
+    def test_many_fluxes_match_single(self, mock_data):
+        dv = calculate_dv(mock_data[0])
+        new_wave = create_log_lam_grid(dv, mock_data[0].min(), mock_data[0].max())["wl"]
+        flux_stack = np.vstack([mock_data[1], 2 * mock_data[1]])
+        fluxes = resample(mock_data[0], flux_stack, new_wave)
+        for flux, fl in zip(fluxes, flux_stack):
+            np.testing.assert_allclose(flux, resample(mock_data[0], fl, new_wave))
+
+    def test_partial_range_matches_full_fit(self, mock_data):
+        wave, flux = mock_data
+        new_wave = np.linspace(wave[len(wave) // 3], wave[len(wave) // 2], 200)
+        full = make_interp_spline(wave, flux, k=5)(new_wave)
+        np.testing.assert_allclose(resample(wave, flux, new_wave), full, rtol=1e-12)
+
+    def test_nan_wave(self, mock_data):
+        wave, flux = mock_data
+        new_wave = np.linspace(wave[len(wave) // 3], wave[len(wave) // 2], 200)
+        new_wave[50] = np.nan
+        full = make_interp_spline(wave, flux, k=5)(new_wave)
+        resampled = resample(wave, flux, new_wave)
+        assert np.isnan(resampled[50])
+        finite = np.isfinite(new_wave)
+        np.testing.assert_allclose(resampled[finite], full[finite], rtol=1e-12)
+
+    def test_nan_flux(self, mock_data):
+        wave, flux = mock_data
+        new_wave = np.linspace(wave[len(wave) // 3], wave[len(wave) // 2], 200)
+        flux_stack = np.vstack([flux, flux])
+        flux_stack[0, 2 * len(wave) // 5] = np.nan
+        fluxes = resample(wave, flux_stack, new_wave)
+        assert np.all(np.isnan(fluxes[0]))
+        np.testing.assert_allclose(fluxes[1], resample(wave, flux, new_wave))
+
     @pytest.mark.parametrize(
         "benchmark_data", [100, 500, 1000, 5000, 10000], indirect=True
     )
@@ -21,6 +21,16 @@ def test_grid_keys():
     assert "NAXIS1" in grid
 
 
+@pytest.mark.parametrize("dv", [0.5, 1, 100, 1000, 1e6])
+def test_grid_power_of_two(dv):
+    grid = create_log_lam_grid(dv, 1e4, 4e4)
+    N = np.log10(4e4 / 1e4) / np.log10(dv / 2.99792458e5 + 1)
+    NAXIS1 = grid["NAXIS1"]
+    assert NAXIS1 == len(grid["wl"])
+    assert NAXIS1 >= 2 and NAXIS1 & (NAXIS1 - 1) == 0
+    assert NAXIS1 >= N and (NAXIS1 == 2 or NAXIS1 // 2 < N)
+
+
 def test_calculate_dv_types():
     wave = np.linspace(1e4, 4e4)
     dv_np = calculate_dv(wave)